@@ -15,22 +15,28 @@ def detect_ground(profile):
     :rtype: float
     """
 
-    force = profile.samples.force
-    distance = profile.samples.distance
-
-    ground = distance.iloc[-1]
-
-    if force.max() >= profile.overload:
-        i_ol = force.argmax()
-        i_threshhold = np.where(distance.values >= distance.values[i_ol] - 20)[0][0]
-        f_mean = np.mean(force.iloc[0:i_threshhold])
-        f_std = np.std(force.iloc[0:i_threshhold])
+    force = profile.samples.force.values
+    distance = profile.samples.distance.values
+
+    ground = distance[-1]
+
+    i_ol = force.argmax()
+    if force[i_ol] >= profile.overload:
+        # Distance is monotonically increasing, binary search for the first
+        # sample within 20 mm before the overload instead of masking all
+        i_threshhold = np.searchsorted(distance, distance[i_ol] - 20, side='left')
+        f_mean = np.mean(force[0:i_threshhold])
+        f_std = np.std(force[0:i_threshhold])
         threshhold = f_mean + 5 * f_std
 
-        while force.iloc[i_ol] > threshhold:
-            i_ol -= 10
+        # Walk back from overload in steps of 10 samples until force is no
+        # longer above threshold. All steps are compared at once.
+        steps = force[i_ol::-10]
+        below = np.flatnonzero(~(steps > threshhold))
+        k = below[0] if below.size else steps.size - 1
+        i_ol -= 10 * k
 
-        ground = distance.iloc[i_ol]
+        ground = distance[i_ol]
 
     log.info('Detected ground at {:.3f} mm in profile {}'.format(ground, profile))
     return ground
@@ -60,14 +66,24 @@ def detect_surface(profile):
 
         max_force = np.amax(force)
 
-        for i in np.arange(100, x_grad.size):
-            std = np.std(y_grad[:i - 1])
-            mean = np.mean(y_grad[:i - 1])
-            if y_grad[i] >= 5 * std + mean:
-                surface = x_grad[i]
-                break
-
-        if i == x_grad.size - 1:
+        # Surface is the first gradient value (after the first 100) exceeding
+        # mean plus 5 standard deviations of all gradient values before it,
+        # excluding its direct predecessor. Instead of recalculating mean and
+        # standard deviation for each candidate, calculate them for all
+        # prefixes at once using cumulative sums. Values are shifted by the
+        # first gradient value, which doesn't change the standard deviation
+        # but lessens cancellation.
+        n = x_grad.size
+        y_grad = y_grad[:n] - y_grad[0]
+        count = np.arange(1, n + 1)
+        mean = np.cumsum(y_grad) / count
+        std = np.sqrt(np.maximum(np.cumsum(y_grad ** 2) / count - mean ** 2, 0))
+
+        # Mean and standard deviation of y_grad[:i - 1] are found at i - 2
+        exceeding = np.flatnonzero(y_grad[100:] >= 5 * std[98:n - 2] + mean[98:n - 2])
+        if exceeding.size and exceeding[0] + 100 < n - 1:
+            surface = x_grad[exceeding[0] + 100]
+        else:
             surface = max_force
 
         log.info('Detected surface at {:.3f} mm in profile {}'.format(surface, profile))
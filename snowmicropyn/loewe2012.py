@@ -42,6 +42,9 @@ def calc_step(spatial_res, forces, cone_area=SMP_CONE_AREA):
            millimeters.
     :return: A tuple containing lambda, f0, delta and L.
     """
+    # Force samples are stored in single precision. Calculate in double
+    # precision, as equation 11 takes the difference of two very close values.
+    forces = np.asarray(forces, dtype=np.float64)
     n = len(forces)
 
     # Mean and variance of force signal
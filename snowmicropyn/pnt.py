@@ -5,9 +5,11 @@ import struct
 from collections import namedtuple
 from enum import Enum
 
+from pandas import np as np
+
 log = logging.getLogger(__name__)
 
-pnt_header_entry = namedtuple('pnt_header_field', ['value', 'unit'])
+pnt_header_entry = namedtuple('pnt_header_entry', ['value', 'unit'])
 
 
 # noinspection PyClassHasNoInit
@@ -23,7 +25,7 @@ class Pnt:
         print(header[Pnt.Header.TIMESTAMP_YEAR].value)
         print(raw_samples[2000:2005])
 
-    This may prints lines like ``2017`` and ``(40, 41, 42, 43, 42)``.
+    This may prints lines like ``2017`` and ``[40 41 42 43 42]``.
     """
 
     class Header(Enum):
@@ -208,10 +210,11 @@ class Pnt:
 
         This is the low level method used by class :class:`snowmicropyn.Profile`
         to load the content of a pnt file. The method returns a tuple: A header
-        (dict) and the raw measurement values (tuple). The header dictionary
-        contains the header entries. Each entry has a label (``.label``), a
-        unit (``.unit``) and a actual value (``.value``). Each entry can be
-        ``None``. Mostly this is the case for unit.
+        (dict) and the raw measurement values (numpy array of 16 bit
+        integers). The header dictionary contains the header entries. Each
+        entry has a label (``.label``), a unit (``.unit``) and a actual value
+        (``.value``). Each entry can be ``None``. Mostly this is the case for
+        unit.
 
         :param file: Path-like object
         """
@@ -234,10 +237,14 @@ class Pnt:
                 log.info('Read header entry {} = {}{}'.format(pnt_id, repr(value), unit_label))
                 header[pnt_id] = pnt_header_entry(value, unit)
 
+            # Samples are a block of big endian 16 bit integers following the
+            # header, read them in one go
             count = header[Pnt.Header.SAMPLES_COUNT_FORCE].value
-            raw_samples = struct.unpack_from('>{}h'.format(count), raw, offset=512)
+            if count < 0:
+                raise ValueError('Invalid samples count {}'.format(count))
+            raw_samples = np.frombuffer(raw, dtype='>i2', count=count, offset=512)
             log.info('Read {} raw samples from file {}'.format(len(raw_samples), file))
-        except struct.error as e:
+        except (struct.error, ValueError) as e:
             log.exception(e)
             raise ValueError('Failed to load pnt file. Message: ' + str(e))
 
@@ -11,6 +11,15 @@ def chunkup(samples, window, overlap):
     first = samples.distance.iloc[0] if not samples.empty else 0
     last = samples.distance.iloc[-1] if not samples.empty else 0
 
+    # Distance of samples from a profile is monotonically increasing, which
+    # allows to find the samples of a block by binary search. Otherwise fall
+    # back to filtering with a mask, reusing the mask buffers for all blocks.
+    distance = samples.distance.values
+    monotonic = np.all(distance[1:] >= distance[:-1])
+    if not monotonic:
+        within = np.empty(distance.shape, dtype=bool)
+        before_end = np.empty(distance.shape, dtype=bool)
+
     step = window - (window * overlap / 100)
     center = first
     chunks = []
@@ -21,8 +30,15 @@ def chunkup(samples, window, overlap):
 
         # Filter for samples with a block and add it to the list of
         # blocks along with its center (the blocks center distance)
-        within = np.logical_and(samples.distance >= begin, samples.distance < end)
-        chunk_samples = samples[within]
+        if monotonic:
+            start = np.searchsorted(distance, begin, side='left')
+            stop = np.searchsorted(distance, end, side='left')
+            chunk_samples = samples.iloc[start:stop]
+        else:
+            np.greater_equal(distance, begin, out=within)
+            np.less(distance, end, out=before_end)
+            np.logical_and(within, before_end, out=within)
+            chunk_samples = samples[within]
         chunks.append((center, chunk_samples))
 
         center = center + step